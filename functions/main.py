@@ -1,16 +1,92 @@
 # Firebase Functions - 입시뉴스 크롤링 시스템
 import functions_framework
 from firebase_admin import initialize_app, firestore
-import requests
-from bs4 import BeautifulSoup
-import json
+import httpx
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    _HAS_SELECTOLAX = True
+except ImportError:
+    # selectolax 휠이 없는 환경에서는 lxml + XPath 폴백
+    import lxml.html
+    from cssselect import HTMLTranslator
+    _HAS_SELECTOLAX = False
+try:
+    import ahocorasick
+    _HAS_AHOCORASICK = True
+except ImportError:
+    # pyahocorasick 휠이 없으면 키워드 순차 탐색 폴백
+    _HAS_AHOCORASICK = False
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import orjson
 import re
 from datetime import datetime, timedelta
+from urllib.parse import urljoin
 import logging
+from cachetools import TTLCache
 
 # Firebase Admin 초기화
 initialize_app()
 
+# Firestore 클라이언트 - 웜 인보케이션 간 재사용 (gRPC 채널 재초기화 방지)
+_DB = None
+
+def _db():
+    global _DB
+    if _DB is None:
+        _DB = firestore.client()
+    return _DB
+
+# 공통 요청 헤더 (봇 차단 방지)
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'ko-KR,ko;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+}
+
+# 목록 페이지 다운로드 상한 - 비정상적으로 큰 응답으로부터 함수 보호
+_MAX_PAGE_BYTES = 512 * 1024
+
+_HTTPX_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+_HTTPX_LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=8)
+
+def _make_client():
+    """크롤링 한 회차용 비동기 HTTP 클라이언트 생성
+
+    asyncio.run이 회차마다 새 이벤트 루프를 만들므로 커넥션 풀도 루프
+    수명에 맞춰 함께 만든다. HTTP/2를 지원하는 사이트에서는 커넥션 하나에
+    요청이 다중화되고, keep-alive로 회차 내 재요청 핸드셰이크를 아낀다.
+    """
+    # transport를 직접 주면 클라이언트 레벨 http2/limits 인자는 무시되므로
+    # HTTP/2와 풀 한도도 transport에 함께 설정해야 실제로 적용된다
+    return httpx.AsyncClient(
+        headers=DEFAULT_HEADERS,
+        timeout=_HTTPX_TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(
+            retries=2,
+            http2=True,
+            limits=_HTTPX_LIMITS,
+        ),
+        follow_redirects=True,
+    )
+
+# API 응답 캐시 - 크롤링은 주 1회라 10분 단위 재사용이 안전함
+_RESP_CACHE = TTLCache(maxsize=1, ttl=600)
+
+def _json_default(obj):
+    # Firestore의 DatetimeWithNanoseconds도 datetime 하위 클래스라 함께 처리됨
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"직렬화할 수 없는 타입: {type(obj)}")
+
+def _json_dumps(data):
+    """orjson 기반 JSON 직렬화 (UTF-8 그대로 출력)"""
+    return orjson.dumps(data, default=_json_default).decode()
+
 # 교육청 크롤링 설정
 EDUCATION_OFFICES = {
     "교육부": {
@@ -39,6 +115,59 @@ EDUCATION_OFFICES = {
     }
 }
 
+if not _HAS_SELECTOLAX:
+    # CSS→XPath 변환을 행 루프 밖(임포트 시점)으로 끌어올림
+    _translator = HTMLTranslator()
+    for _cfg in EDUCATION_OFFICES.values():
+        _cfg["_row_xpath"] = _translator.css_to_xpath(_cfg["selector"])
+        _cfg["_title_xpath"] = _translator.css_to_xpath(_cfg["title_selector"])
+        _cfg["_date_xpath"] = _translator.css_to_xpath(_cfg["date_selector"])
+
+
+def _extract_rows_selectolax(content, config):
+    """selectolax로 게시글 행에서 (제목, 링크, 날짜) 추출"""
+    tree = LexborHTMLParser(content.decode('utf-8', 'replace'))
+    rows = []
+    for element in tree.css(config["selector"])[:5]:  # 최신 5개만
+        title_element = element.css_first(config["title_selector"])
+        if not title_element:
+            continue
+        # 리프 텍스트는 대부분 직계 노드에 있어 deep=False로 재귀 순회를 생략
+        # (중첩 태그에 싸인 경우만 전체 순회로 폴백)
+        title = title_element.text(deep=False, strip=True) or title_element.text(strip=True)
+        link = title_element.attributes.get('href') or ''
+        date_element = element.css_first(config["date_selector"])
+        date_text = ''
+        if date_element:
+            date_text = date_element.text(deep=False, strip=True) or date_element.text(strip=True)
+        rows.append((title, link, date_text))
+    return rows
+
+
+def _extract_rows_lxml(content, config):
+    """lxml 폴백: 미리 변환해 둔 XPath로 게시글 행 추출"""
+    tree = lxml.html.fromstring(content)
+    rows = []
+    for element in tree.xpath(config["_row_xpath"])[:5]:  # 최신 5개만
+        title_elements = element.xpath(config["_title_xpath"])
+        if not title_elements:
+            continue
+        title_element = title_elements[0]
+        # 직계 텍스트(.text)가 공백뿐이면(예: 중첩 span 앞 개행) text_content()로 폴백
+        title = (title_element.text or '').strip() or title_element.text_content().strip()
+        link = title_element.get('href') or ''
+        date_elements = element.xpath(config["_date_xpath"])
+        date_text = ''
+        if date_elements:
+            date_text = (date_elements[0].text or '').strip() \
+                or date_elements[0].text_content().strip()
+        rows.append((title, link, date_text))
+    return rows
+
+
+_extract_rows = _extract_rows_selectolax if _HAS_SELECTOLAX else _extract_rows_lxml
+
+
 @functions_framework.cloud_event
 def weekly_news_crawler(cloud_event):
     """매주 실행되는 뉴스 크롤링 함수"""
@@ -46,19 +175,27 @@ def weekly_news_crawler(cloud_event):
     
     try:
         # Firestore 클라이언트
-        db = firestore.client()
-        
+        db = _db()
+
         all_articles = []
-        
-        # 각 교육청 크롤링
-        for office_name, config in EDUCATION_OFFICES.items():
-            try:
-                articles = crawl_education_office(office_name, config)
-                all_articles.extend(articles)
-                logging.info(f"✅ {office_name}: {len(articles)}개 기사 수집")
-            except Exception as e:
-                logging.error(f"❌ {office_name} 크롤링 실패: {str(e)}")
+
+        # 각 교육청 동시 크롤링 (단일 이벤트 루프에서 비동기 I/O로 병렬화)
+        async def crawl_all():
+            async with _make_client() as client:
+                tasks = [
+                    crawl_education_office(client, office_name, config)
+                    for office_name, config in EDUCATION_OFFICES.items()
+                ]
+                return await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = asyncio.run(crawl_all())
+
+        for office_name, result in zip(EDUCATION_OFFICES, results):
+            if isinstance(result, Exception):
+                logging.error(f"❌ {office_name} 크롤링 실패: {str(result)}")
                 continue
+            all_articles.extend(result)
+            logging.info(f"✅ {office_name}: {len(result)}개 기사 수집")
         
         # 수집된 기사들을 Firestore에 저장
         if all_articles:
@@ -79,60 +216,43 @@ def weekly_news_crawler(cloud_event):
             "timestamp": datetime.now().isoformat()
         }
 
-def crawl_education_office(office_name, config):
+async def crawl_education_office(client, office_name, config):
     """개별 교육청 웹사이트 크롤링"""
     articles = []
-    
+
+    # 날짜 필터는 일 단위면 충분 - 서수 날짜가 캐시 키가 되어 날이 바뀌면 무효화
+    today_ordinal = datetime.now().toordinal()
+
     try:
-        # 헤더 설정 (봇 차단 방지)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'ko-KR,ko;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        }
-        
-        # 웹페이지 요청
-        response = requests.get(config["url"], headers=headers, timeout=10)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-        
-        # HTML 파싱
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # 게시글 목록 추출
-        article_elements = soup.select(config["selector"])
-        
-        for element in article_elements[:5]:  # 최신 5개만
+        # 웹페이지 요청 (스트리밍으로 상한까지만 읽어 버퍼 복사 방지)
+        async with client.stream('GET', config["url"]) as response:
+            response.raise_for_status()
+            chunks = []
+            received = 0
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                received += len(chunk)
+                if received >= _MAX_PAGE_BYTES:
+                    break
+            content = b''.join(chunks)[:_MAX_PAGE_BYTES]
+
+        # 게시글 행 추출 (환경에 따라 selectolax 또는 lxml 경로)
+        for title, link, date_text in _extract_rows(content, config):
             try:
-                # 제목 추출
-                title_element = element.select_one(config["title_selector"])
-                if not title_element:
-                    continue
-                    
-                title = title_element.get_text().strip()
-                
-                # 링크 추출
-                link = title_element.get('href', '')
                 if link and not link.startswith('http'):
-                    # 상대 경로를 절대 경로로 변환
-                    base_url = '/'.join(config["url"].split('/')[:3])
-                    link = base_url + link
-                
-                # 날짜 추출
-                date_element = element.select_one(config["date_selector"])
-                date_text = date_element.get_text().strip() if date_element else ''
-                
+                    # 상대 경로를 절대 경로로 변환 (urljoin이 루트/상대 경로를 모두 처리)
+                    link = urljoin(config["url"], link)
+
                 # 최근 30일 이내 뉴스만 필터링
-                if is_recent_article(date_text):
+                if is_recent_article(date_text, today_ordinal):
+                    content_summary, category = analyze_title(title)
                     article = {
                         'title': title,
                         'source': office_name,
                         'link': link,
                         'date': date_text,
-                        'content': extract_content_summary(title),
-                        'category': classify_article(title),
+                        'content': content_summary,
+                        'category': category,
                         'created_at': firestore.SERVER_TIMESTAMP
                     }
                     articles.append(article)
@@ -146,81 +266,153 @@ def crawl_education_office(office_name, config):
         
     return articles
 
-def is_recent_article(date_text):
-    """최근 기사인지 확인 (30일 이내)"""
+# 날짜 처리 상수 (행마다 재컴파일하지 않도록 모듈 수준으로 호이스팅)
+_DATE_CLEAN = re.compile(r'[^\d\-.]')
+_FULL_FORMATS = ('%Y-%m-%d', '%Y.%m.%d')
+_SHORT_FORMATS = ('%m-%d', '%m.%d')
+
+@functools.lru_cache(maxsize=512)
+def is_recent_article(date_text, today_ordinal):
+    """최근 기사인지 확인 (30일 이내)
+
+    같은 날짜 문자열이 여러 행에 반복되므로 결과를 캐시한다.
+    today_ordinal이 캐시 키에 들어가 날이 바뀌면 자동 무효화된다.
+    """
+    today = datetime.fromordinal(today_ordinal)
+    cutoff = today - timedelta(days=30)
+    current_year = today.year
+
     try:
         # 다양한 날짜 형식 처리
-        date_text = re.sub(r'[^\d\-\.]', '', date_text)
-        
+        cleaned = _DATE_CLEAN.sub('', date_text)
+
+        # 연도 생략 형식(MM-DD, MM.DD)인지 한 번만 판별
+        if cleaned.count('-') + cleaned.count('.') == 1:
+            formats = _SHORT_FORMATS
+        else:
+            formats = _FULL_FORMATS
+
         # 날짜 파싱 시도
-        for fmt in ['%Y-%m-%d', '%Y.%m.%d', '%m-%d', '%m.%d']:
+        for fmt in formats:
             try:
-                if len(date_text.split('-')) == 2 or len(date_text.split('.')) == 2:
-                    date_text = f"{datetime.now().year}-{date_text}"
-                
-                article_date = datetime.strptime(date_text, fmt)
-                thirty_days_ago = datetime.now() - timedelta(days=30)
-                return article_date >= thirty_days_ago
-            except:
+                article_date = datetime.strptime(cleaned, fmt)
+                if article_date.year == 1900:  # 연도 생략 형식
+                    article_date = article_date.replace(year=current_year)
+                return article_date >= cutoff
+            except ValueError:
                 continue
-        
+
         # 파싱 실패시 최신으로 간주
         return True
-        
-    except:
+
+    except Exception:
         return True
 
+# 제목 키워드 -> 요약문 (간단한 키워드 기반, 실제로는 본문 크롤링 + AI 요약)
+SUMMARY_KEYWORDS = {
+    '입시': '대학입시 관련 중요 공지사항입니다.',
+    '수능': '대학수학능력시험 관련 안내사항입니다.',
+    '전형': '대학 입학전형 변경 또는 안내사항입니다.',
+    '모집': '대학 신입생 모집 관련 정보입니다.',
+    '원서': '입학원서 접수 관련 안내입니다.',
+    '면접': '입학 면접전형 관련 정보입니다.',
+    '특목고': '특목고 입학 관련 안내사항입니다.',
+    '자사고': '자율형사립고 관련 정보입니다.'
+}
+DEFAULT_SUMMARY = '입시 관련 중요 정보를 확인하시기 바랍니다.'
+
+# 분류 키워드 -> 카테고리 (앞쪽 카테고리가 우선)
+CATEGORY_KEYWORDS = (
+    ('major_news', ('대입', '수능', '입시', '전형')),
+    ('university_news', ('대학교', '대학')),
+    ('exam_schedule', ('일정', '모집', '접수', '마감')),
+)
+DEFAULT_CATEGORY = 'education_office_news'
+
+if _HAS_AHOCORASICK:
+    # 모든 키워드를 오토마톤 하나에 넣어 제목을 한 번만 스캔
+    # (같은 단어가 요약/분류 양쪽에 쓰이므로 단어당 레코드 리스트로 보관)
+    _records = {}
+    for _idx, (_kw, _summary) in enumerate(SUMMARY_KEYWORDS.items()):
+        _records.setdefault(_kw, []).append(('summary', _idx, _summary))
+    for _priority, (_category, _words) in enumerate(CATEGORY_KEYWORDS):
+        for _word in _words:
+            _records.setdefault(_word, []).append(('category', _priority, _category))
+
+    _AC = ahocorasick.Automaton()
+    for _word, _recs in _records.items():
+        _AC.add_word(_word, _recs)
+    _AC.make_automaton()
+
+
+def _analyze_title_ac(title):
+    """오토마톤 한 번 순회로 (요약, 카테고리) 동시 결정"""
+    summary_rank = len(SUMMARY_KEYWORDS)
+    summary = DEFAULT_SUMMARY
+    category_rank = len(CATEGORY_KEYWORDS)
+    category = DEFAULT_CATEGORY
+
+    for _, records in _AC.iter(title):
+        for kind, rank, value in records:
+            if kind == 'summary':
+                if rank < summary_rank:
+                    summary_rank, summary = rank, value
+            elif rank < category_rank:
+                category_rank, category = rank, value
+
+    return summary, category
+
+
+def _analyze_title_scan(title):
+    return extract_content_summary(title), classify_article(title)
+
+
+# 제목은 주간 실행 사이에도 반복 등장하므로 분석 결과를 캐시 (제목 ~80바이트라 부담 없음)
+analyze_title = functools.lru_cache(maxsize=1024)(
+    _analyze_title_ac if _HAS_AHOCORASICK else _analyze_title_scan
+)
+
+
 def extract_content_summary(title):
     """제목을 기반으로 내용 요약 생성"""
-    # 간단한 키워드 기반 요약 (실제로는 본문 크롤링 + AI 요약)
-    keywords = {
-        '입시': '대학입시 관련 중요 공지사항입니다.',
-        '수능': '대학수학능력시험 관련 안내사항입니다.',
-        '전형': '대학 입학전형 변경 또는 안내사항입니다.',
-        '모집': '대학 신입생 모집 관련 정보입니다.',
-        '원서': '입학원서 접수 관련 안내입니다.',
-        '면접': '입학 면접전형 관련 정보입니다.',
-        '특목고': '특목고 입학 관련 안내사항입니다.',
-        '자사고': '자율형사립고 관련 정보입니다.'
-    }
-    
-    for keyword, summary in keywords.items():
+    for keyword, summary in SUMMARY_KEYWORDS.items():
         if keyword in title:
             return summary
-    
-    return '입시 관련 중요 정보를 확인하시기 바랍니다.'
+
+    return DEFAULT_SUMMARY
+
+# 폴백 분류용 정규식 - 카테고리당 한 번의 검색으로 판정
+# (키워드가 전부 한글이라 소문자 변환은 불필요)
+_CATEGORY_PATTERNS = tuple(
+    (category, re.compile('|'.join(words)))
+    for category, words in CATEGORY_KEYWORDS
+)
 
 def classify_article(title):
     """기사 분류"""
-    title_lower = title.lower()
-    
-    if any(word in title_lower for word in ['대입', '수능', '입시', '전형']):
-        return 'major_news'
-    elif any(word in title_lower for word in ['대학교', '대학']):
-        return 'university_news'  
-    elif any(word in title_lower for word in ['일정', '모집', '접수', '마감']):
-        return 'exam_schedule'
-    else:
-        return 'education_office_news'
+    for category, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(title):
+            return category
+
+    return DEFAULT_CATEGORY
+
+def _article_doc_id(article):
+    """(출처, 제목) 기반 결정적 문서 ID 생성"""
+    key = f"{article['source']}|{article['title']}".encode()
+    return hashlib.blake2b(key, digest_size=16).hexdigest()
 
 def save_articles_to_firestore(db, articles):
     """Firestore에 기사 저장"""
-    batch = db.batch()
-    
+    # 문서 ID를 (출처, 제목) 해시로 만들어 중복 저장이 같은 문서에 합쳐지도록 함
+    # -> 저장 전 중복 조회 쿼리가 전혀 필요 없음
+    # BulkWriter가 작은 배치로 쪼개 병렬 커밋하고 일시 오류 재시도까지 처리
+    bulk_writer = db.bulk_writer()
+
     for article in articles:
-        # 중복 체크 (제목 + 출처 기준)
-        existing = db.collection('news')\
-            .where('title', '==', article['title'])\
-            .where('source', '==', article['source'])\
-            .limit(1)\
-            .get()
-        
-        if not existing:
-            # 새 기사만 저장
-            doc_ref = db.collection('news').document()
-            batch.set(doc_ref, article)
-    
-    batch.commit()
+        doc_ref = db.collection('news').document(_article_doc_id(article))
+        bulk_writer.set(doc_ref, article, merge=True)
+
+    bulk_writer.close()
 
 @functions_framework.https
 def get_latest_news(request):
@@ -237,34 +429,58 @@ def get_latest_news(request):
         return ('', 204, headers)
     
     try:
-        db = firestore.client()
-        
-        # 카테고리별 뉴스 조회
-        news_data = {
-            'major_news': [],
-            'education_office_news': [],
-            'university_news': [],
-            'exam_schedule': []
-        }
-        
-        # 최근 7일 뉴스
-        week_ago = datetime.now() - timedelta(days=7)
-        
-        for category in news_data.keys():
-            docs = db.collection('news')\
-                .where('category', '==', category)\
-                .order_by('created_at', direction=firestore.Query.DESCENDING)\
-                .limit(5)\
-                .stream()
-            
-            for doc in docs:
-                news_data[category].append(doc.to_dict())
-        
-        return (json.dumps(news_data, ensure_ascii=False), 200, headers)
+        cached = _RESP_CACHE.get('latest')
+
+        if cached is None:
+            db = _db()
+
+            # 카테고리별 뉴스 조회
+            news_data = {
+                'major_news': [],
+                'education_office_news': [],
+                'university_news': [],
+                'exam_schedule': []
+            }
+
+            # 프론트엔드가 실제로 쓰는 필드만 프로젝션해 전송/직렬화 비용 절감
+            _NEWS_FIELDS = ['title', 'source', 'link', 'date', 'content', 'category', 'created_at']
+
+            def fetch_category(category):
+                docs = db.collection('news')\
+                    .where('category', '==', category)\
+                    .order_by('created_at', direction=firestore.Query.DESCENDING)\
+                    .limit(5)\
+                    .select(_NEWS_FIELDS)\
+                    .stream()
+                return [doc.to_dict() for doc in docs]
+
+            # 카테고리별 쿼리는 서로 독립 -> 동시에 실행해 지연을 max(4)로 줄임
+            with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+                futures = {
+                    category: executor.submit(fetch_category, category)
+                    for category in news_data
+                }
+                for category, future in futures.items():
+                    news_data[category] = future.result()
+
+            body = _json_dumps(news_data)
+            etag = hashlib.blake2b(body.encode()).hexdigest()[:16]
+            cached = (body, etag)
+            _RESP_CACHE['latest'] = cached
+
+        body, etag = cached
+        headers['Cache-Control'] = 'public, max-age=600, s-maxage=600'
+        headers['ETag'] = etag
+
+        # 클라이언트/엣지가 이미 같은 본문을 갖고 있으면 304로 본문 전송 생략
+        if request.headers.get('If-None-Match') == etag:
+            return ('', 304, headers)
+
+        return (body, 200, headers)
         
     except Exception as e:
         logging.error(f"뉴스 조회 오류: {str(e)}")
-        return (json.dumps({'error': str(e)}, ensure_ascii=False), 500, headers)
+        return (_json_dumps({'error': str(e)}), 500, headers)
 
 @functions_framework.https  
 def manual_crawl(request):
@@ -284,8 +500,8 @@ def manual_crawl(request):
         fake_event = type('CloudEvent', (), {})()
         result = weekly_news_crawler(fake_event)
         
-        return (json.dumps(result, ensure_ascii=False), 200, headers)
+        return (_json_dumps(result), 200, headers)
         
     except Exception as e:
         logging.error(f"수동 크롤링 오류: {str(e)}")
-        return (json.dumps({'error': str(e)}, ensure_ascii=False), 500, headers)
+        return (_json_dumps({'error': str(e)}), 500, headers)